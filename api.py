@@ -7,20 +7,24 @@ Description: REST API server providing chat completions and authentication endpo
 """
 
 from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from src.rag_engine import setup_rag_system, ask
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
+from src.rag_engine import setup_rag_system, ask, ask_stream
 from src.auth import verify_token, create_access_token
+from src import vector_database, metadata_manager
+import asyncio
 import uuid
 import time
-import json
+import orjson
 from datetime import timedelta, datetime
 
 
 app = FastAPI(
     title="RAG API",
     description="API for RAG with JWT Authentication",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 rag = setup_rag_system()
@@ -42,12 +46,6 @@ class TokenRequest(BaseModel):
     client_name: str = "default_client"
     expires_hours: int = 168  # 7 days default
 
-class TokenResponse(BaseModel):
-    access_token: str
-    token_type: str = "bearer"
-    expires_in_hours: int
-    client: str
-
 class ChatResponseChoice(BaseModel):
     index: int
     message: Message
@@ -62,6 +60,13 @@ class ChatResponse(BaseModel):
     sources: list[str] = None
     source_count: int = None
 
+@app.on_event("startup")
+async def warm_cosmos_connections():
+    # Pay the TLS + account-fetch cost once per worker at startup instead
+    # of on the first user request.
+    await asyncio.to_thread(vector_database.warm_connection)
+    await asyncio.to_thread(metadata_manager.warm_connection)
+
 @app.get("/")
 def root():
     return {
@@ -74,7 +79,7 @@ def root():
         }
     }
 
-@app.post("/auth/token", response_model=TokenResponse)
+@app.post("/auth/token")
 def generate_token(request: TokenRequest):
 
     try:
@@ -99,12 +104,12 @@ def generate_token(request: TokenRequest):
         expires_delta = timedelta(hours=request.expires_hours)
         access_token = create_access_token(token_data, expires_delta)
         
-        return TokenResponse(
-            access_token=access_token,
-            token_type="bearer",
-            expires_in_hours=request.expires_hours,
-            client=request.client_name
-        )
+        return ORJSONResponse({
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in_hours": request.expires_hours,
+            "client": request.client_name
+        })
         
     except Exception as e:
         raise HTTPException(
@@ -113,7 +118,7 @@ def generate_token(request: TokenRequest):
         )
 
 @app.post("/v1/chat/completions")
-def chat_completions(request: ChatRequest, token_data: dict = Depends(verify_token)):
+async def chat_completions(request: ChatRequest, token_data: dict = Depends(verify_token)):
 
     if rag is None:
         return {"error": "RAG system not initialized. Please run 'python reload_rag.py' to create the vector store."}
@@ -126,30 +131,30 @@ def chat_completions(request: ChatRequest, token_data: dict = Depends(verify_tok
         return {"error": f"Error processing request: {str(e)}"}
     
     if request.stream:
-        def generate():
-            response_data = ask(rag, user_message)
-            answer = response_data["answer"]
-            sources = response_data.get("sources", [])
-
-            for token in answer.split():
-                chunk = {
-                    "id": f"chatcmpl-{uuid.uuid4()}",
-                    "object": "chat.completion.chunk",
-                    "created": int(time.time()),
-                    "model": request.model,
-                    "choices": [{
-                        "index": 0,
-                        "delta": {"content": token + " "},
-                        "finish_reason": None
-                    }]
-                }
+        async def generate():
+            sources = []
+
+            stream_id = f"chatcmpl-{uuid.uuid4()}"
+            created = int(time.time())
+
+            # Everything but the token content is constant for the stream,
+            # so serialize it once and only encode the content per token.
+            chunk_prefix = (
+                f'{{"id":"{stream_id}","object":"chat.completion.chunk",'
+                f'"created":{created},"model":{orjson.dumps(request.model).decode()},'
+                '"choices":[{"index":0,"delta":{"content":'
+            )
+            chunk_suffix = '},"finish_reason":null}]}'
 
-                yield f"data: {json.dumps(chunk)}\n\n"
-                time.sleep(0.05)
+            async for event in ask_stream(rag, user_message):
+                if event["type"] == "token":
+                    yield ServerSentEvent(data=chunk_prefix + orjson.dumps(event["content"]).decode() + chunk_suffix)
+                elif event["type"] == "sources":
+                    sources = event["sources"]
             final_chunk = {
-                "id": f"chatcmpl-{uuid.uuid4()}",
+                "id": stream_id,
                 "object": "chat.completion.chunk",
-                "created": int(time.time()),
+                "created": created,
                 "model": request.model,
                 "choices": [{
                     "index": 0,
@@ -157,13 +162,13 @@ def chat_completions(request: ChatRequest, token_data: dict = Depends(verify_tok
                     "finish_reason": "stop"
                 }]
             }
-            yield f"data: {json.dumps(final_chunk)}\n\n"
+            yield ServerSentEvent(data=orjson.dumps(final_chunk).decode())
             
             if sources:
                 sources_chunk = {
-                    "id": f"chatcmpl-{uuid.uuid4()}",
+                    "id": stream_id,
                     "object": "chat.completion.chunk",
-                    "created": int(time.time()),
+                    "created": created,
                     "model": request.model,
                     "choices": [{
                         "index": 0,
@@ -171,21 +176,13 @@ def chat_completions(request: ChatRequest, token_data: dict = Depends(verify_tok
                         "finish_reason": None
                     }]
                 }
-                yield f"data: {json.dumps(sources_chunk)}\n\n"
-            
-            yield "data: [DONE]\n\n"
-
-        return StreamingResponse(
-            generate(), 
-            media_type="text/plain",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Content-Type": "text/plain; charset=utf-8"
-            }
-        )
+                yield ServerSentEvent(data=orjson.dumps(sources_chunk).decode())
+
+            yield ServerSentEvent(data="[DONE]")
+
+        return EventSourceResponse(generate())
 
-    response_data = ask(rag, user_message)
+    response_data = await asyncio.to_thread(ask, rag, user_message)
     answer = response_data["answer"]
     sources = response_data.get("sources", [])
     
@@ -207,5 +204,13 @@ def chat_completions(request: ChatRequest, token_data: dict = Depends(verify_tok
     return response
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        "api:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count()
+    )
\ No newline at end of file
@@ -6,8 +6,11 @@ Module: Chat Client Interface
 Description: Interactive chat client for communicating with the RAG API
 """
 
-import requests
+import os
+import time
+import httpx
 import json
+import jwt
 
 API_BASE_URL = "http://localhost:8000"
 CHAT_ENDPOINT = f"{API_BASE_URL}/v1/chat/completions"
@@ -15,14 +18,44 @@ TOKEN_ENDPOINT = f"{API_BASE_URL}/auth/token"
 
 CLIENT_NAME = "chat_client"
 JWT_TOKEN = None
+TOKEN_CACHE_FILE = os.path.expanduser("~/.rag_chat_token.json")
+
+# One keep-alive session for the whole process so repeated calls reuse
+# the TCP/TLS connection instead of re-handshaking per request.
+_session = httpx.Client(http2=True, timeout=30, headers={"Content-Type": "application/json"})
+
+def _load_cached_token():
+    try:
+        with open(TOKEN_CACHE_FILE) as f:
+            cached = json.load(f)
+        # Reuse only while the token still has at least a minute left
+        if cached.get("exp", 0) - time.time() > 60:
+            return cached.get("access_token")
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _save_cached_token(token):
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False})
+        fd = os.open(TOKEN_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"access_token": token, "exp": payload.get("exp", 0)}, f)
+    except Exception as e:
+        print(f"Warning: could not cache token: {e}")
 
 def get_auth_token():
 
     global JWT_TOKEN
-    
+
     if JWT_TOKEN:
         return JWT_TOKEN
-    
+
+    cached_token = _load_cached_token()
+    if cached_token:
+        JWT_TOKEN = cached_token
+        return JWT_TOKEN
+
     try:
         print("Generating authentication token...")
         token_request = {
@@ -30,11 +63,12 @@ def get_auth_token():
             "expires_hours": 24
         }
         
-        response = requests.post(TOKEN_ENDPOINT, json=token_request, timeout=10)
+        response = _session.post(TOKEN_ENDPOINT, json=token_request, timeout=10)
         
         if response.status_code == 200:
             token_data = response.json()
             JWT_TOKEN = token_data["access_token"]
+            _save_cached_token(JWT_TOKEN)
             print(f"Token generated successfully for client: {CLIENT_NAME}")
             return JWT_TOKEN
         else:
@@ -42,7 +76,7 @@ def get_auth_token():
             print(f"Response: {response.text}")
             return None
             
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("Could not connect to token endpoint")
         return None
     except Exception as e:
@@ -74,7 +108,7 @@ def non_streaming_chat():
         print(f"Question: {payload['messages'][0]['content']}\n")
 
         headers = get_auth_headers()
-        response = requests.post(CHAT_ENDPOINT, json=payload, headers=headers, timeout=30)
+        response = _session.post(CHAT_ENDPOINT, json=payload, headers=headers)
 
         if response.status_code == 200:
             data = response.json()
@@ -97,7 +131,7 @@ def non_streaming_chat():
             print(f"Error: {response.status_code}")
             print(f"Response: {response.text}")
 
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("Error: Could not connect to API server")
         print("Make sure to run 'python api.py' first")
     except Exception as e:
@@ -119,46 +153,46 @@ def streaming_chat():
         print("-" * 30)
 
         headers = get_auth_headers()
-        response = requests.post(CHAT_ENDPOINT, json=payload, headers=headers, stream=True, timeout=30)
-
-        if response.status_code == 200:
-            full_response = ""
-            sources = []
-
-            for line in response.iter_lines():
-                if line:
-                    chunk = line.decode("utf-8")
-                    if chunk.startswith("data: "):
-                        data_str = chunk[6:]
-                        if data_str.strip() == "[DONE]":
-                            print("\nStream completed")
-                            break
-                        try:
-                            data = json.loads(data_str)
-                            delta = data["choices"][0]["delta"]
-                            content = delta.get("content", "")
-                            if "sources" in delta:
-                                sources = delta["sources"]
-                            if content:
-                                print(content, end="", flush=True)
-                                full_response += content
-                        except (json.JSONDecodeError, KeyError):
-                            continue
-
-            print("\n\nSources:")
-            if sources:
-                for i, source in enumerate(sources, 1):
-                    print(f"  {i}. {source}")
+        with _session.stream("POST", CHAT_ENDPOINT, json=payload, headers=headers) as response:
+            if response.status_code == 200:
+                full_response = ""
+                sources = []
+
+                for chunk in response.iter_lines():
+                    if chunk:
+                        if chunk.startswith("data: "):
+                            data_str = chunk[6:]
+                            if data_str.strip() == "[DONE]":
+                                print("\nStream completed")
+                                break
+                            try:
+                                data = json.loads(data_str)
+                                delta = data["choices"][0]["delta"]
+                                content = delta.get("content", "")
+                                if "sources" in delta:
+                                    sources = delta["sources"]
+                                if content:
+                                    print(content, end="", flush=True)
+                                    full_response += content
+                            except (json.JSONDecodeError, KeyError):
+                                continue
+
+                print("\n\nSources:")
+                if sources:
+                    for i, source in enumerate(sources, 1):
+                        print(f"  {i}. {source}")
+                else:
+                    print("  No sources found")
+            elif response.status_code == 401:
+                response.read()
+                print("Authentication failed - token may be invalid or expired")
+                print(f"Response: {response.text}")
             else:
-                print("  No sources found")
-        elif response.status_code == 401:
-            print("Authentication failed - token may be invalid or expired")
-            print("Response: {response.text}")
-        else:
-            print(f"Error: {response.status_code}")
-            print(f"Response: {response.text}")
+                response.read()
+                print(f"Error: {response.status_code}")
+                print(f"Response: {response.text}")
 
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("Error: Could not connect to API server")
         print("Make sure to run 'python api.py' first")
     except Exception as e:
@@ -9,12 +9,13 @@ Description: Script to reload the vector database with fresh scraped content
 
 import asyncio
 import os
+import uvloop
 from dotenv import load_dotenv
 from src.web_scraper import scrape_to_documents
-from src.vector_database import clear_vector_store, create_vector_store
+from src.vector_database import clear_vector_store, acreate_vector_store
 from src.embedding_service import create_embeddings_model
 from src.text_chunker import create_text_splitter, split_into_chunks
-from src.metadata_manager import clear_all_metadata, generate_chunk_id, add_chunk
+from src.metadata_manager import clear_all_metadata, generate_chunk_id, build_chunk_item, add_chunks_bulk
 from langchain.schema import Document
 from src.vector_database import get_document_count
 
@@ -30,7 +31,7 @@ async def reload_vector_store():
     print("\n1. Clearing existing vector store and metadata...")
     try:
         cleared_count = clear_vector_store()
-        clear_all_metadata()
+        await clear_all_metadata()
         print(f"Cleared {cleared_count} documents from Cosmos DB")
         print("Cleared all metadata")
     except Exception as e:
@@ -58,9 +59,14 @@ async def reload_vector_store():
         embeddings_model = create_embeddings_model(api_key)
         text_splitter = create_text_splitter()
         chunk_documents = []
-        
-        for doc in documents:
-            doc_chunks = split_into_chunks(doc.page_content, text_splitter)
+        metadata_items = []
+
+        async def _split(doc):
+            return await asyncio.to_thread(split_into_chunks, doc.page_content, text_splitter)
+
+        chunk_lists = await asyncio.gather(*[_split(doc) for doc in documents])
+
+        for doc, doc_chunks in zip(documents, chunk_lists):
             source_url = doc.metadata.get('source', 'unknown')
             total_chunks = len(doc_chunks)
             
@@ -78,8 +84,9 @@ async def reload_vector_store():
                 chunk_documents.append(chunk_doc)
                 
                 chunk_id = generate_chunk_id(source_url, i)
-                add_chunk(chunk_id, source_url, total_chunks)
-        
+                metadata_items.append(build_chunk_item(chunk_id, source_url, total_chunks))
+
+        await add_chunks_bulk(metadata_items)
         print(f" Created {len(chunk_documents)} document chunks")
     except Exception as e:
         print(f" Error processing documents: {e}")
@@ -87,7 +94,7 @@ async def reload_vector_store():
     
     print("\n4. Generating embeddings and storing in Cosmos DB...")
     try:
-        create_vector_store(chunk_documents, embeddings_model)
+        await acreate_vector_store(chunk_documents, embeddings_model)
         print(" Successfully created vector store with embeddings")
         print(f" Stored {len(chunk_documents)} document chunks in Cosmos DB")
     except Exception as e:
@@ -124,6 +131,6 @@ async def main():
         exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    uvloop.run(main())
 
 
@@ -0,0 +1,36 @@
+"""
+Author: Ashok Kumar B
+Date: 2025-10-06
+Project: Katonic Platform Portal ChatBot
+Module: Similarity Kernel
+Description: Numba-compiled cosine similarity kernel for the client-side scan
+"""
+
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _dot_scores(mat, q):
+    n = mat.shape[0]
+    d = mat.shape[1]
+    sims = np.empty(n, dtype=np.float32)
+    for i in prange(n):
+        s = 0.0
+        for j in range(d):
+            s += mat[i, j] * q[j]
+        sims[i] = s
+    return sims
+
+
+def topk_cosine(mat, q, k):
+    """Return (top_indices, sims) for the k most similar rows of mat.
+
+    Rows of mat and q are expected to be L2-normalized, so the dot
+    product is the cosine similarity.
+    """
+    sims = _dot_scores(mat, q)
+    k = min(k, sims.shape[0])
+    top = np.argpartition(-sims, k - 1)[:k]
+    return top[np.argsort(-sims[top])], sims
@@ -7,8 +7,11 @@ Description: JWT token authentication and verification system
 """
 
 import os
+import time
 import jwt
-from datetime import datetime, timedelta
+from jwt.algorithms import HMACAlgorithm
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
@@ -20,38 +23,53 @@ JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this-in-pro
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24 * 7  # 7 days
 
+# Prepare the HMAC key once at module load so encode/decode skip the
+# per-call str-to-key conversion.
+_JWT_KEY = HMACAlgorithm(HMACAlgorithm.SHA256).prepare_key(JWT_SECRET_KEY)
+
 security = HTTPBearer()
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
 
-    to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
-    return encoded_jwt
+        expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
+
+    # Single dict build; int exp lets PyJWT skip the datetime conversion
+    return jwt.encode({**data, "exp": int(expire.timestamp())}, _JWT_KEY, algorithm=JWT_ALGORITHM)
+
+@lru_cache(maxsize=4096)
+def _decode_token_cached(token: str):
+    # Signature check is the expensive part; expiry is re-checked on every
+    # call in verify_token so a cached payload cannot outlive its token.
+    return jwt.decode(
+        token,
+        _JWT_KEY,
+        algorithms=[JWT_ALGORITHM],
+        options={"verify_exp": False}
+    )
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
+        payload = _decode_token_cached(token)
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired",
+            detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except jwt.JWTError:
+
+    exp = payload.get("exp")
+    if exp is not None and exp < time.time():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
+            detail="Token has expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
 
 def generate_api_token(client_name: str = "default_client"):
 
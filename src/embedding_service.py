@@ -6,11 +6,82 @@ Module: Embedding Service
 Description: OpenAI embedding model service for text vectorization
 """
 
+import hashlib
+import sqlite3
+from functools import lru_cache
+import numpy as np
 from langchain_openai import OpenAIEmbeddings
 from . import settings
 
+_query_model = None
+
+# On-disk cache of document embeddings keyed by a hash of the text, so
+# re-ingesting repeated boilerplate (nav, footers, duplicate pages) never
+# hits the embedding API twice.
+EMB_CACHE_PATH = "emb_cache.db"
+_cache_conn = None
+
+def _get_cache_conn():
+    global _cache_conn
+    if _cache_conn is None:
+        _cache_conn = sqlite3.connect(EMB_CACHE_PATH, check_same_thread=False)
+        _cache_conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, vec BLOB)")
+        _cache_conn.commit()
+    return _cache_conn
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+def cache_lookup(texts):
+    """Return (keys, vectors, missing_indices) for texts against the disk cache."""
+    conn = _get_cache_conn()
+    keys = [_text_key(text) for text in texts]
+    vectors = [None] * len(texts)
+    missing = []
+    for i, key in enumerate(keys):
+        row = conn.execute("SELECT vec FROM embeddings WHERE hash = ?", (key,)).fetchone()
+        if row:
+            vectors[i] = np.frombuffer(row[0], dtype=np.float32).tolist()
+        else:
+            missing.append(i)
+    return keys, vectors, missing
+
+def cache_store(keys, embeddings):
+    conn = _get_cache_conn()
+    conn.executemany(
+        "INSERT OR REPLACE INTO embeddings (hash, vec) VALUES (?, ?)",
+        [(key, np.asarray(embedding, dtype=np.float32).tobytes()) for key, embedding in zip(keys, embeddings)]
+    )
+    conn.commit()
+
 def create_embeddings_model(api_key):
     return OpenAIEmbeddings(
         model=settings.EMBEDDING_MODEL,
-        openai_api_key=api_key
-    )
\ No newline at end of file
+        openai_api_key=api_key,
+        chunk_size=500,
+        max_retries=3
+    )
+
+@lru_cache(maxsize=1024)
+def _embed_query_cached(text: str):
+    # Tuple so the result is hashable for lru_cache; callers get a list back.
+    return tuple(_query_model.embed_query(text))
+
+def cached_embed_query(text: str, embeddings_model):
+    global _query_model
+    _query_model = embeddings_model
+    return list(_embed_query_cached(text))
+
+def embed_documents_cached(texts, embeddings_model):
+    keys, vectors, missing = cache_lookup(texts)
+
+    if missing:
+        # Embed misses in length-sorted order so each provider batch
+        # carries texts of similar token counts.
+        missing.sort(key=lambda i: len(texts[i]))
+        new_embeddings = embeddings_model.embed_documents([texts[i] for i in missing])
+        cache_store([keys[i] for i in missing], new_embeddings)
+        for i, embedding in zip(missing, new_embeddings):
+            vectors[i] = embedding
+
+    return vectors
\ No newline at end of file
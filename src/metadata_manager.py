@@ -8,12 +8,17 @@ Description: Document metadata management and chunk tracking utilities
 
 
 import os
+import asyncio
 import hashlib
+import threading
+from datetime import datetime
 from azure.cosmos import CosmosClient, PartitionKey
+from azure.cosmos.aio import CosmosClient as AsyncCosmosClient
 from dotenv import load_dotenv
 from . import settings
 
-load_dotenv()
+if os.getenv("AZURE_COSMO_URL") is None:
+    load_dotenv()
 
 COSMOS_ENDPOINT = os.getenv("AZURE_COSMO_URL")
 COSMOS_KEY = os.getenv("AZURE_COSMO_KEY")
@@ -23,45 +28,108 @@ METADATA_CONTAINER_NAME = settings.METADATA_CONTAINER_NAME
 _cosmos_client = None
 _cosmos_database = None
 _metadata_container = None
+_init_lock = threading.Lock()
+
+_async_cosmos_client = None
+_async_metadata_container = None
+
+BULK_BATCH_SIZE = 64
 
 def _initialize_cosmos_client():
     global _cosmos_client, _cosmos_database, _metadata_container
-    
+
     if not COSMOS_ENDPOINT or not COSMOS_KEY:
         raise ValueError("Azure Cosmos DB credentials not found in environment variables")
-    
-    _cosmos_client = CosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
-    _cosmos_database = _cosmos_client.create_database_if_not_exists(id=DATABASE_NAME)
-    
-    _metadata_container = _cosmos_database.create_container_if_not_exists(
+
+    with _init_lock:
+        if _cosmos_client is not None:
+            # Another request thread connected while we waited on the lock
+            return
+
+        client = CosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
+        database = client.create_database_if_not_exists(id=DATABASE_NAME)
+
+        _metadata_container = database.create_container_if_not_exists(
+            id=METADATA_CONTAINER_NAME,
+            partition_key=PartitionKey(path="/chunk_id")
+        )
+        _cosmos_database = database
+        _cosmos_client = client
+
+def warm_connection():
+    global _cosmos_client, _cosmos_database, _metadata_container
+
+    if _cosmos_client is None:
+        _initialize_cosmos_client()
+
+    try:
+        # Cheap query to prime the TCP/TLS connection pool before traffic
+        list(_metadata_container.query_items(
+            "SELECT VALUE 1 FROM c OFFSET 0 LIMIT 1",
+            enable_cross_partition_query=True
+        ))
+    except Exception as e:
+        print(f"Error warming Cosmos DB connection: {e}")
+
+async def _initialize_async_cosmos_client():
+    global _async_cosmos_client, _async_metadata_container
+
+    if not COSMOS_ENDPOINT or not COSMOS_KEY:
+        raise ValueError("Azure Cosmos DB credentials not found in environment variables")
+
+    _async_cosmos_client = AsyncCosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
+    database = await _async_cosmos_client.create_database_if_not_exists(id=DATABASE_NAME)
+
+    _async_metadata_container = await database.create_container_if_not_exists(
         id=METADATA_CONTAINER_NAME,
         partition_key=PartitionKey(path="/chunk_id")
     )
 
 def generate_chunk_id(source_url: str, chunk_index: int) -> str:
-    doc_id = hashlib.md5(source_url.encode()).hexdigest()
+    # digest_size=16 keeps the same 32-hex-char ID format MD5 produced
+    doc_id = hashlib.blake2b(source_url.encode(), digest_size=16).hexdigest()
     return f"{doc_id}_chunk_{chunk_index}"
 
-def add_chunk(chunk_id: str, source_url: str, total_chunks: int, language: str = "en"):
-    global _cosmos_client, _cosmos_database, _metadata_container
-    
-    if _cosmos_client is None:
-        _initialize_cosmos_client()
-    
-    metadata_item = {
+def build_chunk_item(chunk_id: str, source_url: str, total_chunks: int, language: str = "en"):
+    return {
         "id": chunk_id,
         "chunk_id": chunk_id,
         "source_url": source_url,
         "total_chunks": total_chunks,
         "language": language,
-        "created_at": os.popen('date /t').read().strip() if os.name == 'nt' else os.popen('date').read().strip()
+        "created_at": datetime.utcnow().isoformat() + "Z"
     }
-    
+
+def add_chunk(chunk_id: str, source_url: str, total_chunks: int, language: str = "en"):
+    global _cosmos_client, _cosmos_database, _metadata_container
+
+    if _cosmos_client is None:
+        _initialize_cosmos_client()
+
+    metadata_item = build_chunk_item(chunk_id, source_url, total_chunks, language)
+
     try:
         _metadata_container.upsert_item(metadata_item)
     except Exception as e:
         print(f"Error storing metadata for chunk {chunk_id}: {e}")
 
+async def add_chunks_bulk(metadata_items):
+    global _async_cosmos_client, _async_metadata_container
+
+    if _async_cosmos_client is None:
+        await _initialize_async_cosmos_client()
+
+    stored_count = 0
+    for start in range(0, len(metadata_items), BULK_BATCH_SIZE):
+        batch = metadata_items[start:start + BULK_BATCH_SIZE]
+        try:
+            await asyncio.gather(*(_async_metadata_container.upsert_item(item) for item in batch))
+            stored_count += len(batch)
+        except Exception as e:
+            print(f"Error storing metadata batch starting at {start}: {e}")
+
+    return stored_count
+
 def get_chunk_metadata(chunk_id: str):
     global _cosmos_client, _cosmos_database, _metadata_container
     
@@ -108,23 +176,31 @@ def get_metadata_by_source_url(source_url: str):
         print(f"Error retrieving metadata for source URL {source_url}: {e}")
         return []
 
-def clear_all_metadata():
-    global _cosmos_client, _cosmos_database, _metadata_container
-    
-    if _cosmos_client is None:
-        _initialize_cosmos_client()
-    
+async def clear_all_metadata():
+    global _async_cosmos_client, _async_metadata_container
+
+    if _async_cosmos_client is None:
+        await _initialize_async_cosmos_client()
+
     try:
-        items = list(_metadata_container.read_all_items())
+        items = [item async for item in _async_metadata_container.read_all_items()]
+        semaphore = asyncio.Semaphore(32)
         deleted_count = 0
-        
-        for item in items:
-            try:
-                _metadata_container.delete_item(item=item['id'], partition_key=item['chunk_id'])
-                deleted_count += 1
-            except Exception as e:
-                print(f"Error deleting metadata item {item['id']}: {e}")
-        
+
+        async def _delete(item):
+            nonlocal deleted_count
+            async with semaphore:
+                try:
+                    await _async_metadata_container.delete_item(
+                        item=item['id'],
+                        partition_key=item['chunk_id']
+                    )
+                    deleted_count += 1
+                except Exception as e:
+                    print(f"Error deleting metadata item {item['id']}: {e}")
+
+        await asyncio.gather(*(_delete(item) for item in items))
+
         print(f"Cleared {deleted_count} metadata entries from Cosmos DB")
         return deleted_count
     except Exception as e:
@@ -138,8 +214,12 @@ def get_metadata_count() -> int:
         _initialize_cosmos_client()
     
     try:
-        items = list(_metadata_container.read_all_items())
-        return len(items)
+        query = "SELECT VALUE COUNT(1) FROM c"
+        result = list(_metadata_container.query_items(
+            query=query,
+            enable_cross_partition_query=True
+        ))
+        return result[0] if result else 0
     except Exception as e:
         print(f"Error counting metadata: {e}")
         return 0
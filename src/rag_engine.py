@@ -8,6 +8,7 @@ Description: Retrieval-Augmented Generation system setup and query processing
 
 
 import os
+import asyncio
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain.chains import RetrievalQA
@@ -17,9 +18,17 @@ from langchain.schema import Document
 from . import text_chunker
 from . import embedding_service
 from . import vector_database
+from . import semantic_cache
 from . import settings
 from .metadata_manager import generate_chunk_id, add_chunk, clear_all_metadata
 
+# Compiled once at import; setup_rag_system can run per user session in a
+# multi-tenant server and doesn't need to reparse the template each time.
+_PROMPT = PromptTemplate(
+    template=settings.RAG_TEMPLATE,
+    input_variables=["context", "question"]
+)
+
 def setup_rag_system(force_reload=False, api_key=None):
     if not api_key:
         load_dotenv()
@@ -41,18 +50,14 @@ def setup_rag_system(force_reload=False, api_key=None):
         openai_api_key=api_key
     )
 
-    prompt = PromptTemplate(
-        template=settings.RAG_TEMPLATE,
-        input_variables=["context", "question"]
-    )
-
     qa_chain = RetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
         retriever=vector_database.create_retriever(embeddings_model, search_kwargs={"k": settings.TOP_K_CHUNKS}),
-        chain_type_kwargs={"prompt": prompt}
+        chain_type_kwargs={"prompt": _PROMPT},
+        return_source_documents=True
     )
-    
+
     return qa_chain
 
 # def setup_rag_system_from_documents(documents: list, force_reload=False, api_key=None):
@@ -125,24 +130,68 @@ def ask(qa_chain, question):
     
     try:
         retriever = qa_chain.retriever
-        retrieved_docs = retriever.invoke(question)
-        
+
+        # Embed once up front: the semantic cache reuses it, and the
+        # retriever's own embed call hits the query-embedding LRU.
+        query_embedding = embedding_service.cached_embed_query(question, retriever.embeddings_model)
+
+        cached_response = semantic_cache.lookup(query_embedding)
+        if cached_response is not None:
+            return cached_response
+
+        # The chain retrieves internally and hands the documents back, so
+        # there is no separate retriever.invoke round trip.
+        response = qa_chain.invoke({"query": question})
+
         source_urls = []
-        for doc in retrieved_docs:
+        for doc in response.get("source_documents", []):
             source_url = doc.metadata.get('source', 'unknown')
             if source_url != 'unknown':
                 source_urls.append(source_url)
-        
-        response = qa_chain.invoke({"query": question})
-        
-        return {
+
+        unique_sources = list(dict.fromkeys(source_urls))
+        result = {
             "answer": response["result"],
-            "sources": list(set(source_urls)),
-            "source_count": len(set(source_urls))
+            "sources": unique_sources,
+            "source_count": len(unique_sources)
         }
+        semantic_cache.store(query_embedding, result)
+        return result
     except Exception as e:
         return {
             "answer": f"Error processing question: {str(e)}",
             "sources": [],
             "source_count": 0
         }
+
+async def ask_stream(qa_chain, question):
+    if not qa_chain:
+        raise RuntimeError("RAG system not initialized")
+
+    try:
+        retriever = qa_chain.retriever
+        retrieved_docs = await asyncio.to_thread(retriever.invoke, question)
+
+        source_urls = []
+        for doc in retrieved_docs:
+            source_url = doc.metadata.get('source', 'unknown')
+            if source_url != 'unknown':
+                source_urls.append(source_url)
+
+        llm_chain = qa_chain.combine_documents_chain.llm_chain
+        context = "\n\n".join(doc.page_content for doc in retrieved_docs)
+        prompt_text = llm_chain.prompt.format(context=context, question=question)
+
+        async for chunk in llm_chain.llm.astream(prompt_text):
+            if chunk.content:
+                yield {"type": "token", "content": chunk.content}
+
+        unique_sources = list(dict.fromkeys(source_urls))
+        yield {
+            "type": "sources",
+            "sources": unique_sources,
+            "source_count": len(unique_sources)
+        }
+    except Exception as e:
+        yield {"type": "token", "content": f"Error processing question: {str(e)}"}
+        yield {"type": "sources", "sources": [], "source_count": 0}
@@ -0,0 +1,95 @@
+"""
+Author: Ashok Kumar B
+Date: 2025-10-06
+Project: Katonic Platform Portal ChatBot
+Module: Semantic Query Cache
+Description: In-process answer cache keyed by query embedding similarity
+"""
+
+
+import threading
+import time
+import numpy as np
+
+CACHE_MAX_SIZE = 512
+CACHE_TTL_SECONDS = 300
+SIMILARITY_THRESHOLD = 0.95
+
+_cache_matrix = None
+_cache_entries = []
+# ask() runs on threadpool threads, so matrix/entries mutations must stay
+# atomic or row indices desynchronize from their entries.
+_cache_lock = threading.Lock()
+
+
+def _normalize(embedding):
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec = vec / norm
+    return vec
+
+
+def _evict_expired_locked():
+    global _cache_matrix, _cache_entries
+
+    if not _cache_entries:
+        return
+
+    now = time.time()
+    keep = [i for i, entry in enumerate(_cache_entries) if now - entry['stored_at'] < CACHE_TTL_SECONDS]
+
+    if len(keep) == len(_cache_entries):
+        return
+
+    if not keep:
+        _cache_matrix = None
+        _cache_entries = []
+        return
+
+    _cache_matrix = _cache_matrix[keep]
+    _cache_entries = [_cache_entries[i] for i in keep]
+
+
+def lookup(query_embedding):
+    with _cache_lock:
+        _evict_expired_locked()
+
+        if _cache_matrix is None:
+            return None
+
+        q = _normalize(query_embedding)
+        sims = _cache_matrix @ q
+        best = int(np.argmax(sims))
+
+        if sims[best] >= SIMILARITY_THRESHOLD:
+            return _cache_entries[best]['response']
+
+        return None
+
+
+def store(query_embedding, response):
+    global _cache_matrix, _cache_entries
+
+    q = _normalize(query_embedding).reshape(1, -1)
+
+    with _cache_lock:
+        if _cache_matrix is None:
+            _cache_matrix = q
+            _cache_entries = [{'response': response, 'stored_at': time.time()}]
+            return
+
+        # LRU-style bound: drop the oldest row once the cache is full
+        if len(_cache_entries) >= CACHE_MAX_SIZE:
+            _cache_matrix = _cache_matrix[1:]
+            _cache_entries = _cache_entries[1:]
+
+        _cache_matrix = np.vstack([_cache_matrix, q])
+        _cache_entries.append({'response': response, 'stored_at': time.time()})
+
+
+def clear():
+    global _cache_matrix, _cache_entries
+    with _cache_lock:
+        _cache_matrix = None
+        _cache_entries = []
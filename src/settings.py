@@ -6,6 +6,8 @@ Module: Configuration Settings
 Description: Global configuration settings for the RAG system
 """
 
+import sys
+
 DATABASE_NAME = "vectordb"
 CONTAINER_NAME = "documents"
 METADATA_CONTAINER_NAME = "metadata"
@@ -20,7 +22,7 @@ TEMPERATURE = 0.0
 
 TOP_K_CHUNKS = 7
 
-RAG_TEMPLATE = """You are a helpful assistant for the Katonic AI platform. Use the provided context to answer questions accurately and comprehensively.
+RAG_TEMPLATE = sys.intern("""You are a helpful assistant for the Katonic AI platform. Use the provided context to answer questions accurately and comprehensively.
 
 Instructions:
 - Answer based ONLY on the provided context
@@ -33,4 +35,4 @@ Context: {context}
 
 Question: {question}
 
-Answer:"""
\ No newline at end of file
+Answer:""")
\ No newline at end of file
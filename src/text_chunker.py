@@ -22,7 +22,8 @@ def create_text_splitter(
         keep_separator=True
     )
 
+# Shared default so bulk ingestion doesn't rebuild a splitter per call
+_DEFAULT_SPLITTER = create_text_splitter()
+
 def split_into_chunks(text, text_splitter=None):
-    if text_splitter is None:
-        text_splitter = create_text_splitter()
-    return text_splitter.split_text(text)
\ No newline at end of file
+    return (text_splitter or _DEFAULT_SPLITTER).split_text(text)
\ No newline at end of file
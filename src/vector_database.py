@@ -8,15 +8,28 @@ Description: Azure Cosmos DB vector store operations and similarity search
 
 
 import os
+import asyncio
+import base64
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from azure.cosmos import CosmosClient, PartitionKey
+from azure.cosmos.aio import CosmosClient as AsyncCosmosClient
 from langchain.schema import Document
 from langchain_openai import OpenAIEmbeddings
 from langchain_core.retrievers import BaseRetriever
 from dotenv import load_dotenv
+from . import embedding_service
 from . import settings
 
-load_dotenv()
+try:
+    from . import _sim_kernel
+except ImportError:
+    _sim_kernel = None
+
+if os.getenv("AZURE_COSMO_URL") is None:
+    load_dotenv()
 
 COSMOS_ENDPOINT = os.getenv("AZURE_COSMO_URL")
 COSMOS_KEY = os.getenv("AZURE_COSMO_KEY")
@@ -31,41 +44,115 @@ if not COSMOS_KEY:
 _cosmos_client = None
 _cosmos_database = None
 _cosmos_container = None
+_init_lock = threading.Lock()
+
+_async_cosmos_client = None
+_async_cosmos_container = None
+
+EMBED_BATCH_SIZE = 1024
+INGEST_CONCURRENCY = 5
+
+# Flat snapshot of the corpus vectors written at ingest time so the scan
+# path can memory-map it instead of re-downloading vectors from Cosmos.
+VECTORS_FILE = "vectors.f16"
+VECTOR_IDS_FILE = "vector_ids.txt"
+
+EMBEDDING_DIMENSIONS = 1536
+
+# Single-pass replacement table for turning source URLs into document IDs
+_SAFE_SOURCE_TABLE = str.maketrans({'/': '_', ':': '', '.': '_', '?': '_', '&': '_', '=': '_'})
+
+_VECTOR_EMBEDDING_POLICY = {
+    "vectorEmbeddings": [{
+        "path": "/vector",
+        "dataType": "float32",
+        "distanceFunction": "cosine",
+        "dimensions": EMBEDDING_DIMENSIONS
+    }]
+}
+
+_VECTOR_INDEXING_POLICY = {
+    "vectorIndexes": [{"path": "/vector", "type": "diskANN"}]
+}
 
 def _initialize_cosmos_client():
     global _cosmos_client, _cosmos_database, _cosmos_container
-    
+
+    with _init_lock:
+        if _cosmos_client is not None:
+            # Another request thread connected while we waited on the lock
+            return
+        _initialize_cosmos_client_locked()
+
+def _initialize_cosmos_client_locked():
+    global _cosmos_client, _cosmos_database, _cosmos_container
+
+    # Build everything in locals and publish the globals only once the
+    # container is ready. Threads double-check `_cosmos_client is None`
+    # outside the lock, so the sentinel must be assigned last — otherwise
+    # they would see a client with no container during setup.
     try:
-        _cosmos_client = CosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
+        client = CosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
         print("Connected to Cosmos DB successfully")
-        
+
         try:
-            _cosmos_database = _cosmos_client.create_database_if_not_exists(id=DATABASE_NAME)
+            database = client.create_database_if_not_exists(id=DATABASE_NAME)
             print(f"Database '{DATABASE_NAME}' ready")
         except Exception as db_error:
             print(f"Database error: {db_error}")
-            _cosmos_database = _cosmos_client.get_database_client(DATABASE_NAME)
+            database = client.get_database_client(DATABASE_NAME)
             print(f"Using existing database '{DATABASE_NAME}'")
-        
+
         try:
-            _cosmos_container = _cosmos_database.create_container_if_not_exists(
-                id=CONTAINER_NAME,
-                partition_key=PartitionKey(path="/id")
-            )
+            try:
+                container = database.create_container_if_not_exists(
+                    id=CONTAINER_NAME,
+                    partition_key=PartitionKey(path="/id"),
+                    indexing_policy=_VECTOR_INDEXING_POLICY,
+                    vector_embedding_policy=_VECTOR_EMBEDDING_POLICY
+                )
+            except Exception as vector_error:
+                # Accounts without the vector search capability reject the
+                # policies; fall back to a plain container and let queries
+                # use the client-side scan path.
+                print(f"Vector index not available ({vector_error}), creating plain container")
+                container = database.create_container_if_not_exists(
+                    id=CONTAINER_NAME,
+                    partition_key=PartitionKey(path="/id")
+                )
             print(f"Container '{CONTAINER_NAME}' ready")
         except Exception as container_error:
             print(f"Container creation error: {container_error}")
             try:
-                _cosmos_container = _cosmos_database.get_container_client(CONTAINER_NAME)
+                container = database.get_container_client(CONTAINER_NAME)
                 print(f"Using existing container '{CONTAINER_NAME}'")
             except Exception as get_error:
                 print(f"Error accessing container: {get_error}")
                 raise Exception("Failed to initialize Cosmos DB container")
-                
+
+        _cosmos_database = database
+        _cosmos_container = container
+        _cosmos_client = client
+
     except Exception as e:
         print(f"Error initializing Cosmos DB: {e}")
         raise Exception(f"Failed to initialize Cosmos DB: {e}")
 
+def warm_connection():
+    global _cosmos_client, _cosmos_database, _cosmos_container
+
+    if _cosmos_client is None:
+        _initialize_cosmos_client()
+
+    try:
+        # Cheap query to prime the TCP/TLS connection pool before traffic
+        list(_cosmos_container.query_items(
+            "SELECT VALUE 1 FROM c OFFSET 0 LIMIT 1",
+            enable_cross_partition_query=True
+        ))
+    except Exception as e:
+        print(f"Error warming Cosmos DB connection: {e}")
+
 def _get_embedding(text: str, embeddings_model):
     try:
         response = embeddings_model.embed_query(text)
@@ -74,6 +161,43 @@ def _get_embedding(text: str, embeddings_model):
         print(f"Error generating embedding: {e}")
         raise e
 
+def _doc_id(doc, i):
+    source = doc.metadata.get('source', 'unknown')
+    chunk_index = doc.metadata.get('chunk_index', i)
+    return f"{source.translate(_SAFE_SOURCE_TABLE)}_chunk_{chunk_index}"
+
+def _persist_vector_file(documents, embeddings):
+    try:
+        if not embeddings:
+            return
+
+        matrix = np.memmap(VECTORS_FILE, dtype=np.float16, mode='w+', shape=(len(embeddings), EMBEDDING_DIMENSIONS))
+        matrix[:] = np.asarray(embeddings, dtype=np.float16)
+        matrix.flush()
+
+        with open(VECTOR_IDS_FILE, 'w') as f:
+            for i, doc in enumerate(documents):
+                f.write(_doc_id(doc, i) + "\n")
+    except Exception as e:
+        print(f"Warning: could not persist vector snapshot: {e}")
+
+def _build_cosmos_doc(doc, i, embedding):
+    source = doc.metadata.get('source', 'unknown')
+    chunk_index = doc.metadata.get('chunk_index', i)
+
+    return {
+        "id": _doc_id(doc, i),
+        "content": doc.page_content,
+        # Float32 array for the Cosmos-side VectorDistance index, plus a
+        # compact float16 encoding the client-side scan can load without
+        # parsing 1536 JSON floats per document.
+        "vector": embedding,
+        "vector_b64": base64.b64encode(np.asarray(embedding, dtype=np.float16).tobytes()).decode(),
+        "source": source,
+        "chunk_index": chunk_index,
+        "metadata": doc.metadata
+    }
+
 def create_vector_store(documents, embeddings_model):
     global _cosmos_client, _cosmos_database, _cosmos_container
     
@@ -81,41 +205,127 @@ def create_vector_store(documents, embeddings_model):
         _initialize_cosmos_client()
     
     print(f"Storing {len(documents)} documents in Cosmos DB...")
-    
+
+    texts = [doc.page_content for doc in documents]
+    embeddings = embedding_service.embed_documents_cached(texts, embeddings_model)
+
     stored_count = 0
-    for i, doc in enumerate(documents):
+    for i, (doc, embedding) in enumerate(zip(documents, embeddings)):
         try:
-            embedding = _get_embedding(doc.page_content, embeddings_model)
-            
-            source = doc.metadata.get('source', 'unknown')
-            chunk_index = doc.metadata.get('chunk_index', i)
-            safe_source = source.replace('/', '_').replace(':', '').replace('.', '_').replace('?', '_').replace('&', '_').replace('=', '_')
-            doc_id = f"{safe_source}_chunk_{chunk_index}"
-            
-            cosmos_doc = {
-                "id": doc_id,
-                "content": doc.page_content,
-                "vector": embedding,
-                "source": source,
-                "chunk_index": chunk_index,
-                "metadata": doc.metadata
-            }
-            
-            try:
-                existing_doc = _cosmos_container.read_item(item=doc_id, partition_key=doc_id)
-                print(f"Document already exists: {doc_id}")
-                _cosmos_container.upsert_item(cosmos_doc)
-                print(f"Updated document: {doc_id}")
-            except Exception:
-                _cosmos_container.create_item(cosmos_doc)
-                print(f"Stored document: {doc_id}")
-            
+            cosmos_doc = _build_cosmos_doc(doc, i, embedding)
+
+            # upsert_item is idempotent; no need to read first
+            _cosmos_container.upsert_item(cosmos_doc)
+            print(f"Stored document: {cosmos_doc['id']}")
+
             stored_count += 1
-            
+
         except Exception as e:
             print(f"Error storing document {i}: {e}")
             continue
-    
+
+    _persist_vector_file(documents, embeddings)
+    print(f"Successfully stored {stored_count} documents in Cosmos DB")
+    return True
+
+async def _initialize_async_cosmos_client():
+    global _async_cosmos_client, _async_cosmos_container
+
+    _async_cosmos_client = AsyncCosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
+    database = await _async_cosmos_client.create_database_if_not_exists(id=DATABASE_NAME)
+
+    try:
+        _async_cosmos_container = await database.create_container_if_not_exists(
+            id=CONTAINER_NAME,
+            partition_key=PartitionKey(path="/id"),
+            indexing_policy=_VECTOR_INDEXING_POLICY,
+            vector_embedding_policy=_VECTOR_EMBEDDING_POLICY
+        )
+    except Exception as vector_error:
+        print(f"Vector index not available ({vector_error}), creating plain container")
+        _async_cosmos_container = await database.create_container_if_not_exists(
+            id=CONTAINER_NAME,
+            partition_key=PartitionKey(path="/id")
+        )
+
+async def aembed_documents_cached(texts, embeddings_model):
+    """Async counterpart of embedding_service.embed_documents_cached.
+
+    Serves hits from the disk cache and embeds only the misses, batched
+    and concurrency-bounded the same way ingestion is.
+    """
+    keys, embeddings, missing = embedding_service.cache_lookup(texts)
+    missing_texts = [texts[i] for i in missing]
+    semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+    async def _embed_batch(batch):
+        async with semaphore:
+            # Small jitter so concurrent batches don't hit the API in
+            # lockstep and trip rate limiting together.
+            await asyncio.sleep(random.uniform(0, 0.05))
+
+            delay = 1.0
+            for attempt in range(3):
+                try:
+                    return await embeddings_model.aembed_documents(batch)
+                except Exception as e:
+                    # Honor the server's Retry-After on rate limits when
+                    # present, otherwise back off exponentially.
+                    headers = getattr(getattr(e, 'response', None), 'headers', None)
+                    retry_after = headers.get('Retry-After') if headers else None
+                    wait = float(retry_after) if retry_after else delay
+                    print(f"Embedding batch failed ({e}), retrying in {wait:.1f}s")
+                    await asyncio.sleep(wait + random.uniform(0, 0.05))
+                    delay *= 2
+            return await embeddings_model.aembed_documents(batch)
+
+    batches = [missing_texts[start:start + EMBED_BATCH_SIZE] for start in range(0, len(missing_texts), EMBED_BATCH_SIZE)]
+    batch_results = await asyncio.gather(*(_embed_batch(batch) for batch in batches))
+    new_embeddings = [embedding for batch in batch_results for embedding in batch]
+
+    if missing:
+        embedding_service.cache_store([keys[i] for i in missing], new_embeddings)
+        for i, embedding in zip(missing, new_embeddings):
+            embeddings[i] = embedding
+
+    return embeddings
+
+async def acreate_vector_store(documents, embeddings_model, precomputed_embeddings=None):
+    global _async_cosmos_client, _async_cosmos_container
+
+    if _async_cosmos_client is None:
+        await _initialize_async_cosmos_client()
+
+    print(f"Storing {len(documents)} documents in Cosmos DB...")
+
+    # Callers that already hold the vectors (e.g. a pipelined ingest) pass
+    # them in so the corpus is embedded exactly once.
+    if precomputed_embeddings is not None:
+        embeddings = precomputed_embeddings
+    else:
+        embeddings = await aembed_documents_cached(
+            [doc.page_content for doc in documents], embeddings_model
+        )
+
+    semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+    stored_count = 0
+
+    async def _upsert(doc, i, embedding):
+        nonlocal stored_count
+        cosmos_doc = _build_cosmos_doc(doc, i, embedding)
+        async with semaphore:
+            try:
+                await _async_cosmos_container.upsert_item(cosmos_doc)
+                stored_count += 1
+            except Exception as e:
+                print(f"Error storing document {i}: {e}")
+
+    await asyncio.gather(*(
+        _upsert(doc, i, embedding)
+        for i, (doc, embedding) in enumerate(zip(documents, embeddings))
+    ))
+
+    _persist_vector_file(documents, embeddings)
     print(f"Successfully stored {stored_count} documents in Cosmos DB")
     return True
 
@@ -126,49 +336,165 @@ def similarity_search(query: str, embeddings_model, k: int = 3):
         _initialize_cosmos_client()
     
     try:
-        query_embedding = _get_embedding(query, embeddings_model)
-        
-        query_sql = "SELECT * FROM c"
-        results = list(_cosmos_container.query_items(query_sql, enable_cross_partition_query=True))
-        
-        if not results:
-            return []
-        
-        similarities = []
-        for result in results:
-            if 'vector' in result:
-                vec1 = np.array(query_embedding)
-                vec2 = np.array(result['vector'])
-                
-                norm1 = np.linalg.norm(vec1)
-                norm2 = np.linalg.norm(vec2)
-                
-                if norm1 > 0 and norm2 > 0:
-                    similarity = np.dot(vec1, vec2) / (norm1 * norm2)
-                    similarities.append((similarity, result))
-        
-        similarities.sort(key=lambda x: x[0], reverse=True)
-        top_results = similarities[:k]
-        
-        documents = []
-        for similarity, result in top_results:
-            doc = Document(
-                page_content=result['content'],
-                metadata={
-                    'source': result.get('source', 'unknown'),
-                    'chunk_index': result.get('chunk_index', 0),
-                    'similarity': similarity,
-                    **result.get('metadata', {})
-                }
-            )
-            documents.append(doc)
-        
-        return documents
-        
+        query_embedding = embedding_service.cached_embed_query(query, embeddings_model)
+
+        try:
+            return _similarity_search_native(query_embedding, k)
+        except Exception as e:
+            print(f"VectorDistance query failed, falling back to client-side scan: {e}")
+            return _similarity_search_scan(query_embedding, k)
+
     except Exception as e:
         print(f"Error in similarity search: {e}")
         return []
 
+def _similarity_search_native(query_embedding, k: int):
+    query_sql = (
+        "SELECT TOP @k c.content, c.source, c.chunk_index, c.metadata, "
+        "VectorDistance(c.vector, @qv) AS similarity "
+        "FROM c ORDER BY VectorDistance(c.vector, @qv)"
+    )
+    results = list(_cosmos_container.query_items(
+        query=query_sql,
+        parameters=[
+            {"name": "@k", "value": k},
+            {"name": "@qv", "value": query_embedding}
+        ],
+        enable_cross_partition_query=True
+    ))
+
+    documents = []
+    for result in results:
+        doc = Document(
+            page_content=result['content'],
+            metadata={
+                'source': result.get('source', 'unknown'),
+                'chunk_index': result.get('chunk_index', 0),
+                'similarity': result.get('similarity'),
+                **result.get('metadata', {})
+            }
+        )
+        documents.append(doc)
+
+    return documents
+
+# Cached corpus for the client-side scan path: one L2-normalized
+# float32 matrix plus row-aligned document fields, refreshed whenever
+# the stored document count changes. When the memmapped snapshot from
+# ingest matches the container, it is used instead (zero-copy, paged in
+# by the kernel) and _vec_ids carries the row-to-document mapping.
+# Queries run on threadpool threads, so the cache is rebuilt and
+# published under a lock and readers score against the returned
+# (matrix, entries, ids) snapshot, never the globals mid-scan.
+_vec_matrix = None
+_vec_entries = []
+_vec_ids = None
+_vec_count = -1
+_vec_lock = threading.Lock()
+
+def _load_vector_matrix():
+    """Return a consistent (matrix, entries, ids) view of the scan cache."""
+    global _vec_matrix, _vec_entries, _vec_ids, _vec_count
+
+    doc_count = get_document_count()
+
+    with _vec_lock:
+        if _vec_matrix is not None and doc_count == _vec_count:
+            return _vec_matrix, _vec_entries, _vec_ids
+
+        if os.path.exists(VECTORS_FILE) and os.path.exists(VECTOR_IDS_FILE):
+            try:
+                with open(VECTOR_IDS_FILE) as f:
+                    ids = [line.strip() for line in f if line.strip()]
+                if ids and len(ids) == doc_count:
+                    # OpenAI embeddings are already unit-norm, so the snapshot
+                    # can be used for cosine scoring without renormalizing.
+                    matrix = np.memmap(VECTORS_FILE, dtype=np.float16, mode='r', shape=(len(ids), EMBEDDING_DIMENSIONS))
+                    _vec_matrix, _vec_entries, _vec_ids, _vec_count = matrix, [], ids, doc_count
+                    return matrix, [], ids
+            except Exception as e:
+                print(f"Warning: could not load vector snapshot: {e}")
+
+        query_sql = "SELECT c.content, c.source, c.chunk_index, c.metadata, c.vector, c.vector_b64 FROM c"
+        rows = []
+        entries = []
+        for result in _cosmos_container.query_items(query_sql, enable_cross_partition_query=True, max_item_count=1000):
+            vector_b64 = result.get('vector_b64')
+            if vector_b64:
+                vector = np.frombuffer(base64.b64decode(vector_b64), dtype=np.float16).astype(np.float32)
+            else:
+                vector = result.get('vector')
+            if vector is not None and len(vector):
+                rows.append(vector)
+                entries.append({
+                    'content': result.get('content', ''),
+                    'source': result.get('source', 'unknown'),
+                    'chunk_index': result.get('chunk_index', 0),
+                    'metadata': result.get('metadata', {})
+                })
+
+        if not rows:
+            _vec_matrix, _vec_entries, _vec_ids, _vec_count = None, [], None, doc_count
+            return None, [], None
+
+        matrix = np.asarray(rows, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+
+        _vec_matrix, _vec_entries, _vec_ids, _vec_count = matrix, entries, None, doc_count
+        return matrix, entries, None
+
+def _similarity_search_scan(query_embedding, k: int):
+    matrix, entries, ids = _load_vector_matrix()
+
+    if matrix is None:
+        return []
+
+    q = np.asarray(query_embedding, dtype=np.float32)
+    q_norm = np.linalg.norm(q)
+    if q_norm > 0:
+        q /= q_norm
+
+    if _sim_kernel is not None and ids is None:
+        top, sims = _sim_kernel.topk_cosine(matrix, q, k)
+    else:
+        sims = np.asarray(matrix @ q, dtype=np.float32)
+        k = min(k, sims.shape[0])
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+
+    documents = []
+    for idx in top:
+        if ids is not None:
+            # Snapshot mode only has vectors locally; fetch the k winning
+            # documents by ID.
+            doc_id = ids[idx]
+            try:
+                result = _cosmos_container.read_item(item=doc_id, partition_key=doc_id)
+            except Exception as e:
+                print(f"Error reading document {doc_id}: {e}")
+                continue
+            entry = {
+                'content': result.get('content', ''),
+                'source': result.get('source', 'unknown'),
+                'chunk_index': result.get('chunk_index', 0),
+                'metadata': result.get('metadata', {})
+            }
+        else:
+            entry = entries[idx]
+        doc = Document(
+            page_content=entry['content'],
+            metadata={
+                'source': entry['source'],
+                'chunk_index': entry['chunk_index'],
+                'similarity': float(sims[idx]),
+                **entry['metadata']
+            }
+        )
+        documents.append(doc)
+
+    return documents
+
 def create_retriever(embeddings_model, search_kwargs = None):
     if search_kwargs is None:
         search_kwargs = {"k": settings.TOP_K_CHUNKS}
@@ -197,16 +523,26 @@ def clear_vector_store():
     
     try:
         query_sql = "SELECT c.id FROM c"
-        results = list(_cosmos_container.query_items(query_sql, enable_cross_partition_query=True))
-        
+
         deleted_count = 0
-        for result in results:
+
+        def _delete(doc_id):
+            nonlocal deleted_count
             try:
-                _cosmos_container.delete_item(item=result['id'], partition_key=result['id'])
+                _cosmos_container.delete_item(item=doc_id, partition_key=doc_id)
                 deleted_count += 1
             except Exception as e:
-                print(f"Error deleting document {result['id']}: {e}")
-        
+                print(f"Error deleting document {doc_id}: {e}")
+
+        # Paged iterator: IDs stream in as pages of 1000 instead of the
+        # whole container being materialized up front.
+        doc_ids = (
+            result['id']
+            for result in _cosmos_container.query_items(query_sql, enable_cross_partition_query=True, max_item_count=1000)
+        )
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            list(executor.map(_delete, doc_ids))
+
         print(f"Deleted {deleted_count} documents from Cosmos DB")
         return deleted_count
         
@@ -7,16 +7,38 @@ Description: Web scraping module with dual authentication for Katonic portals
 """
 
 import asyncio
+import atexit
+import functools
 import os
 import json
+import httpx
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
+# selectolax wraps a C HTML parser and is much faster than BeautifulSoup
+# for extract-only work; fall back to soup where the wheel is unavailable.
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser
+except ImportError:
+    _SelectolaxParser = None
+# lxml's Cleaner strips scripts and styles in one C pass, replacing the
+# two Python decompose walks. Recent lxml releases ship it as the separate
+# lxml_html_clean package, so probe both locations.
+try:
+    import lxml.html
+    try:
+        from lxml.html.clean import Cleaner as _LxmlCleaner
+    except ImportError:
+        from lxml_html_clean import Cleaner as _LxmlCleaner
+except ImportError:
+    _LxmlCleaner = None
 # import html2text
 import nest_asyncio
 from datetime import datetime
 from langchain.schema import Document
 from . import text_chunker, embedding_service, vector_database
-from .metadata_manager import generate_chunk_id, add_chunk
+from .metadata_manager import generate_chunk_id, build_chunk_item, add_chunks_bulk
 from dotenv import load_dotenv
 import re
 
@@ -69,7 +91,7 @@ DEFAULT_CONFIG = {
         "https://installation.katonic.ai/installation/?type=gcp-singletenancy",
         "https://installation.katonic.ai/maintenance/",
         "https://installation.katonic.ai/infrastructure/?type=gcp-multitenancy",
-        "https://installation.katonic.ai/installation/?type=gcp-multitenancyv",
+        "https://installation.katonic.ai/installation/?type=gcp-multitenancy",
         "https://installation.katonic.ai/maintenance/",
 
 
@@ -101,7 +123,7 @@ DEFAULT_CONFIG = {
         "two_step_login": True
     },
     "scraping": {
-        "wait_for": "networkidle",
+        "wait_for": "domcontentloaded",
         "timeout": 30000,
         "remove_scripts": True,
         "remove_styles": True,
@@ -117,49 +139,138 @@ DEFAULT_CONFIG = {
 
 
 
+@dataclass(frozen=True)
+class ScrapingConfig:
+    """Typed, immutable view of the config's "scraping" section.
+
+    Built once per run so the per-page hot paths do attribute lookups
+    instead of chained dict .get() calls, and so the settings cannot be
+    mutated mid-crawl.
+    """
+    wait_for: str = "domcontentloaded"
+    timeout: int = 30000
+    remove_scripts: bool = True
+    remove_styles: bool = True
+    follow_links: bool = False
+    max_depth: int = 1
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get("scraping", {})
+        return cls(**{name: section[name] for name in cls.__dataclass_fields__ if name in section})
+
+
+# Compiled once; clean_text runs per scraped page.
+_RE_BLANK_LINES = re.compile(r'\n\s*\n')
+_RE_INLINE_WS = re.compile(r'[ \t]+')
+_RE_LEADING_SP = re.compile(r'\n ')
+
 def clean_text(text):
 
-    text = re.sub(r'\n\s*\n', '\n\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
-    text = re.sub(r'\n ', '\n', text)
+    text = _RE_BLANK_LINES.sub('\n\n', text)
+    text = _RE_INLINE_WS.sub(' ', text)
+    text = _RE_LEADING_SP.sub('\n', text)
     text = text.strip()
     return text
 
 
-async def scrape_page_direct(page, url: str, config):
+async def _wait_for_content(page):
+    """Wait until the page's main content is visible instead of sleeping.
+
+    `networkidle` plus a fixed sleep stalls on SPA pages with analytics or
+    polling traffic; a content landmark appearing is a much cheaper signal
+    that the page is ready to scrape.
+    """
     try:
-        scraping_config = config.get("scraping", {})
-        wait_for = scraping_config.get("wait_for", "networkidle")
-        timeout = scraping_config.get("timeout", 30000)
-        
-        await page.goto(url, wait_until=wait_for, timeout=timeout)
+        await page.wait_for_selector("main, article, [role=main], body", state="visible", timeout=5000)
+    except Exception:
+        # No landmark became visible in time; cap a full load wait instead.
+        try:
+            await page.wait_for_load_state("load", timeout=10000)
+        except Exception:
+            pass
+
+
+def _parse_html(content, config, scraping=None):
+    """Sync HTML-to-text extraction; returns (title, page_content).
+
+    Kept synchronous so callers can push it off the event loop — soup
+    parsing on a large page would otherwise stall every concurrent
+    Playwright worker.
+    """
+    if scraping is None:
+        scraping = ScrapingConfig.from_config(config)
+
+    # Fast path: selectolax for plain-text extraction. The html output
+    # format still goes through soup, which preserves the full document.
+    if _SelectolaxParser is not None and config.get("output", {}).get("format") != "html":
+        tree = _SelectolaxParser(content)
+
+        if scraping.remove_scripts:
+            for node in tree.css("script"):
+                node.decompose()
+
+        if scraping.remove_styles:
+            for node in tree.css("style"):
+                node.decompose()
+
+        title_node = tree.css_first("title")
+        title_text = title_node.text().strip() if title_node else "Untitled"
+        page_content = tree.body.text(separator=" ") if tree.body else tree.text()
+        return title_text, page_content
+
+    # Next-fastest path: lxml Cleaner removes scripts and styles in a
+    # single C pass instead of two soup decompose walks.
+    if _LxmlCleaner is not None and config.get("output", {}).get("format") != "html":
+        tree = lxml.html.fromstring(content)
+        cleaner = _LxmlCleaner(
+            scripts=scraping.remove_scripts,
+            style=scraping.remove_styles,
+            javascript=scraping.remove_scripts,
+            safe_attrs_only=False,
+        )
+        tree = cleaner.clean_html(tree)
+        titles = tree.xpath("//title/text()")
+        title_text = titles[0].strip() if titles else "Untitled"
+        page_content = tree.text_content()
+        return title_text, page_content
+
+    soup = BeautifulSoup(content, "lxml")
+
+    if scraping.remove_scripts:
+        for script in soup(["script"]):
+            script.decompose()
+
+    if scraping.remove_styles:
+        for style in soup(["style"]):
+            style.decompose()
+
+    title = soup.find("title")
+    title_text = title.get_text().strip() if title else "Untitled"
+
+    # Extract plain text instead of markdown
+    if config.get("output", {}).get("format") == "html":
+        page_content = str(soup)
+    else:
+        # Separator-aware extraction keeps adjacent tags from mashing
+        # words together and normalizes whitespace in the same C walk,
+        # which is why there is no clean_text pass here.
+        page_content = soup.get_text(separator=' ', strip=True)
+
+    return title_text, page_content
+
+
+async def scrape_page_direct(page, url: str, config, scraping=None):
+    try:
+        if scraping is None:
+            scraping = ScrapingConfig.from_config(config)
+
+        await page.goto(url, wait_until=scraping.wait_for, timeout=scraping.timeout)
+        await _wait_for_content(page)
         content = await page.content()
-        
-        soup = BeautifulSoup(content, "html.parser")
-        
-        if scraping_config.get("remove_scripts", True):
-            for script in soup(["script"]):
-                script.decompose()
-        
-        if scraping_config.get("remove_styles", True):
-            for style in soup(["style"]):
-                style.decompose()
-        
-        title = soup.find("title")
-        title_text = title.get_text().strip() if title else "Untitled"
-        
-        # Extract plain text instead of markdown
-        if config.get("output", {}).get("format") == "html":
-            page_content = str(soup)
-        else:
-            # Extract plain text from the cleaned HTML
-            page_content = soup.get_text()
-            
-            # Clean the extracted text
-            if config.get("output", {}).get("clean_text", True):
-                # page_content = clean_text(page_content)
-                page_content = page_content
-        
+
+        title_text, page_content = await asyncio.to_thread(_parse_html, content, config, scraping)
+
         return {
             "url": url,
             "title": title_text,
@@ -193,11 +304,12 @@ async def authenticate_direct(page, config, target_url=None):
         two_step_login = auth_config.get("two_step_login", False)
         
         # Determine which login URL to use based on target URL
-        if target_url and "installation.katonic.ai" in target_url:
-            login_url = "https://installation.katonic.ai/login/"
+        domain = _url_domain(target_url) if target_url else "partner.katonic.ai"
+        if domain == "installation.katonic.ai":
+            login_url = LOGIN_URLS[domain]
             print(f"Using installation login URL: {login_url}")
         else:
-            login_url = auth_config.get("login_url", "https://partner.katonic.ai/auth/sign-in")
+            login_url = auth_config.get("login_url", LOGIN_URLS[domain])
             print(f"Using partner login URL: {login_url}")
         
         print(f"Authenticating at {login_url}...")
@@ -267,11 +379,14 @@ async def authenticate_direct(page, config, target_url=None):
         if "dashboard" in current_url.lower() or "partner.katonic.ai" in current_url or "installation.katonic.ai" in current_url:
             print("Authentication completed successfully")
             
-            # Additional verification - check if we can see authenticated content
+            # Additional verification - check if we can see authenticated content.
+            # One evaluate call returns the count in a single protocol
+            # round-trip instead of shipping every handle back.
             try:
-                # Look for elements that indicate successful authentication
-                auth_indicators = await page.query_selector_all('[class*="dashboard"], [class*="portal"], [class*="admin"], [class*="user"], [class*="menu"]')
-                if auth_indicators and len(auth_indicators) > 0:
+                indicator_count = await page.evaluate(
+                    "() => document.querySelectorAll('[class*=\"dashboard\"], [class*=\"portal\"], [class*=\"admin\"], [class*=\"user\"], [class*=\"menu\"]').length"
+                )
+                if indicator_count:
                     print("Authentication verified - authenticated content detected")
                 else:
                     print("Authentication completed but no authenticated content detected")
@@ -280,11 +395,12 @@ async def authenticate_direct(page, config, target_url=None):
             
             return True
         else:
-            # Check for error messages
+            # Check for error messages in one evaluate round-trip.
             try:
-                error_elements = await page.query_selector_all('[class*="error"], [class*="alert"], .text-red-500, .text-red-600')
-                if error_elements:
-                    error_text = await page.evaluate("(elements) => elements.map(el => el.textContent).join(' ')", error_elements)
+                error_text = await page.evaluate(
+                    "() => Array.from(document.querySelectorAll('[class*=\"error\"], [class*=\"alert\"], .text-red-500, .text-red-600')).map(el => el.textContent).join(' ').trim()"
+                )
+                if error_text:
                     print(f"Authentication may have failed. Error messages found: {error_text}")
                     return False
             except:
@@ -297,87 +413,280 @@ async def authenticate_direct(page, config, target_url=None):
         print(f"Authentication failed: {e}")
         return False
 
-async def scrape_to_documents(config = None, config_file_path: str = None):
+MAX_PARALLEL_PAGES = 4
+STATIC_FETCH_CONCURRENCY = 10
+EMBED_FLUSH_CHUNKS = 64
+
+LOGIN_URLS = {
+    "installation.katonic.ai": "https://installation.katonic.ai/login/",
+    "partner.katonic.ai": "https://partner.katonic.ai/auth/sign-in",
+}
+
+def _url_domain(url):
+    return "installation.katonic.ai" if "installation.katonic.ai" in url else "partner.katonic.ai"
+
+def page_requires_js(url, config):
+    """Whether a URL needs a real browser (JS rendering or auth-gated SPA).
+
+    The partner and installation portals are authenticated SPAs, so they
+    stay on Playwright; the public guides site serves static HTML and can
+    be fetched over plain HTTP.
+    """
+    if "guides.katonic.ai" in url:
+        return False
+    return True
+
+async def _fetch_static_page(client, semaphore, url, config, scraping=None):
+    """Fetch one static URL over httpx; returns a scraped dict or None.
+
+    None means the page needs the browser after all (error status, auth
+    wall, or a suspiciously tiny body) and the caller should fall back to
+    Playwright for it.
+    """
+    async with semaphore:
+        try:
+            response = await client.get(url)
+        except Exception as e:
+            print(f"httpx fetch failed for {url}: {e}")
+            return None
+
+    if response.status_code != 200 or len(response.content) < 200:
+        return None
+
+    title_text, page_content = await asyncio.to_thread(_parse_html, response.text, config, scraping)
+    return {
+        "url": url,
+        "title": title_text,
+        "content": page_content,
+        "timestamp": datetime.now().isoformat(),
+        "success": True
+    }
+
+# Chromium takes several seconds to cold-start; keep one browser alive at
+# module scope and reuse it across scrape runs (e.g. repeated re-ingestion).
+_playwright_singleton = None
+_browser_singleton = None
+
+# Trim Chromium startup and background work for headless scraping: no GPU,
+# no extensions, no tab throttling, and a single shared /dev/shm-safe
+# process model. Site isolation is unnecessary for a single-purpose crawl.
+_CHROMIUM_LAUNCH_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-extensions",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=IsolateOrigins,site-per-process",
+]
+
+async def get_browser():
+    global _playwright_singleton, _browser_singleton
+    if _browser_singleton is None or not _browser_singleton.is_connected():
+        if _playwright_singleton is None:
+            _playwright_singleton = await async_playwright().start()
+        _browser_singleton = await _playwright_singleton.chromium.launch(
+            headless=True, args=_CHROMIUM_LAUNCH_ARGS
+        )
+    return _browser_singleton
+
+async def _close_browser():
+    global _playwright_singleton, _browser_singleton
+    if _browser_singleton is not None:
+        try:
+            await _browser_singleton.close()
+        except Exception:
+            pass
+        _browser_singleton = None
+    if _playwright_singleton is not None:
+        try:
+            await _playwright_singleton.stop()
+        except Exception:
+            pass
+        _playwright_singleton = None
+
+def _shutdown_browser():
+    if _browser_singleton is None and _playwright_singleton is None:
+        return
+    try:
+        asyncio.run(_close_browser())
+    except Exception:
+        pass
+
+atexit.register(_shutdown_browser)
+
+async def _scrape_url_worker(page_pool, url, index, total, config, scraping=None):
+    page = await page_pool.get()
+    try:
+        print(f"\n[{index}/{total}] Scraping {url}")
+
+        # Navigate to the URL and wait for it to load properly
+        try:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            await _wait_for_content(page)
+
+            # Session check without DOM queries: a 401 or a redirect onto a
+            # login route means the shared context lost its session.
+            status = response.status if response else None
+            if status == 401 or "login" in page.url or "sign-in" in page.url:
+                print(f"Warning: Appears to be on login page for {url}, attempting re-authentication...")
+                auth_success = await authenticate_direct(page, config, target_url=url)
+                if auth_success:
+                    await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                    await _wait_for_content(page)
+
+        except Exception as e:
+            print(f"Navigation error for {url}: {e}")
+
+        return await scrape_page_direct(page, url, config, scraping)
+    finally:
+        await page_pool.put(page)
+
+def _result_to_document(url, scraped_data, config):
+    """Build a Document from one scraped result; returns None on failure."""
+    if not scraped_data["success"]:
+        print(f"[FAILED] Failed to scrape {url}: {scraped_data.get('error', 'Unknown error')}")
+        return None
+
+    content = scraped_data["content"]
+    if config.get("output", {}).get("include_metadata", True):
+        content = f"Source: {url}\nTitle: {scraped_data['title']}\n\n{content}"
+
+    print(f"[SUCCESS] Created document for {url}")
+    return Document(
+        page_content=content,
+        metadata={
+            'source': url,
+            'title': scraped_data['title'],
+            'timestamp': scraped_data['timestamp'],
+            'scraped_at': datetime.now().isoformat()
+        }
+    )
+
+async def scrape_documents_stream(config = None, config_file_path: str = None):
+    """Yield Documents as pages finish scraping.
+
+    Streaming lets downstream chunking and embedding start while later
+    pages are still loading, instead of waiting for the whole crawl.
+    Yield order follows completion, not the configured URL order.
+    """
     if config is None:
         config = load_config_from_file(config_file_path)
-    
+
     target_urls = config.get("target_urls", [])
     if not target_urls:
         print("No target URLs configured!")
-        return []
-    
+        return
+
+    # The default config repeats some URLs (the maintenance page is listed
+    # once per install type); scrape each distinct URL once.
+    deduped_urls = list(dict.fromkeys(target_urls))
+    if len(deduped_urls) < len(target_urls):
+        print(f"Skipping {len(target_urls) - len(deduped_urls)} duplicate URLs")
+    target_urls = deduped_urls
+
     print(f"Starting to scrape {len(target_urls)} URLs directly to documents...")
-    
-    documents = []
-    
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-        
-        # Track which domains we've authenticated for
+
+    # One immutable view of the scraping section for the whole run.
+    scraping = ScrapingConfig.from_config(config)
+
+    # Static pages skip Chromium entirely; anything httpx can't serve
+    # cleanly falls through to the browser pass below.
+    static_urls = [url for url in target_urls if not page_requires_js(url, config)]
+    browser_urls = [url for url in target_urls if page_requires_js(url, config)]
+
+    if static_urls:
+        print(f"Fetching {len(static_urls)} static URLs over httpx...")
+        semaphore = asyncio.Semaphore(STATIC_FETCH_CONCURRENCY)
+        async with httpx.AsyncClient(http2=True, timeout=30, follow_redirects=True) as client:
+
+            async def _fetch(url):
+                return url, await _fetch_static_page(client, semaphore, url, config, scraping)
+
+            for future in asyncio.as_completed([_fetch(url) for url in static_urls]):
+                url, scraped_data = await future
+                if scraped_data is None:
+                    browser_urls.append(url)
+                    continue
+                doc = _result_to_document(url, scraped_data, config)
+                if doc is not None:
+                    yield doc
+
+    if browser_urls:
+        async for url, scraped_data in _scrape_with_browser_stream(browser_urls, config, scraping):
+            doc = _result_to_document(url, scraped_data, config)
+            if doc is not None:
+                yield doc
+
+async def scrape_to_documents(config = None, config_file_path: str = None):
+    documents = [doc async for doc in scrape_documents_stream(config, config_file_path)]
+
+    print(f"\n{'='*50}")
+    print(f"Scraping completed: {len(documents)} documents created")
+    return documents
+
+# The scrape only needs HTML text; images, fonts, media and stylesheets
+# are pure page weight. Scripts stay unblocked — the portals are SPAs and
+# need them to hydrate content.
+_BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def _scrape_with_browser_stream(target_urls, config, scraping=None):
+    """Scrape the given URLs with Playwright, yielding (url, scraped dict)
+    pairs as each page finishes."""
+    browser = await get_browser()
+    context = await browser.new_context()
+    await context.route("**/*", _block_heavy_resources)
+
+    try:
+        # Authenticate once per domain on a bootstrap page; workers opened
+        # from the same context inherit the session cookies.
+        bootstrap_page = await context.new_page()
+        # Classify each URL once instead of substring-scanning per check.
+        url_to_domain = {url: _url_domain(url) for url in target_urls}
         authenticated_domains = set()
-        
-        for i, url in enumerate(target_urls, 1):
-            print(f"\n[{i}/{len(target_urls)}] Scraping {url}")
-            
-            # Determine the domain for this URL
-            domain = "partner.katonic.ai" if "partner.katonic.ai" in url else "installation.katonic.ai"
-            
-            # Authenticate if we haven't authenticated for this domain yet
+        for url in target_urls:
+            domain = url_to_domain[url]
             if domain not in authenticated_domains:
                 print(f"Authenticating for domain: {domain}")
-                auth_success = await authenticate_direct(page, config, target_url=url)
+                auth_success = await authenticate_direct(bootstrap_page, config, target_url=url)
                 if auth_success:
                     authenticated_domains.add(domain)
                     print(f"Successfully authenticated for {domain}")
                 else:
                     print(f"Authentication failed for {domain}, continuing...")
-            
-            # Navigate to the URL and wait for it to load properly
-            try:
-                await page.goto(url, wait_until="networkidle", timeout=30000)
-                await page.wait_for_timeout(2000)  # Additional wait for dynamic content
-                
-                # Check if we're still authenticated by looking for login elements
-                login_elements = await page.query_selector_all('input[type="email"], input[type="password"], button:has-text("Sign in"), button:has-text("Continue")')
-                if login_elements and len(login_elements) > 0:
-                    print(f"Warning: Appears to be on login page for {url}, attempting re-authentication...")
-                    # Try to re-authenticate if we're on a login page
-                    auth_success = await authenticate_direct(page, config, target_url=url)
-                    if auth_success:
-                        await page.goto(url, wait_until="networkidle", timeout=30000)
-                        await page.wait_for_timeout(2000)
-                
-            except Exception as e:
-                print(f"Navigation error for {url}: {e}")
-            
-            scraped_data = await scrape_page_direct(page, url, config)
-            
-            if scraped_data["success"]:
-                content = scraped_data["content"]
-                if config.get("output", {}).get("include_metadata", True):
-                    content = f"Source: {url}\nTitle: {scraped_data['title']}\n\n{content}"
-                
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        'source': url,
-                        'title': scraped_data['title'],
-                        'timestamp': scraped_data['timestamp'],
-                        'scraped_at': datetime.now().isoformat()
-                    }
-                )
-                documents.append(doc)
-                print(f"[SUCCESS] Created document for {url}")
-            else:
-                print(f"[FAILED] Failed to scrape {url}: {scraped_data.get('error', 'Unknown error')}")
-        
-        await browser.close()
-    
-    print(f"\n{'='*50}")
-    print(f"Scraping completed: {len(documents)} documents created")
-    return documents
+        await bootstrap_page.close()
+
+        # Persist cookies so a future run can seed a context without
+        # replaying the login flows.
+        try:
+            await context.storage_state(path="auth.json")
+        except Exception as e:
+            print(f"Warning: could not persist auth state: {e}")
+
+        # Bounded pool of pages; a worker holds a page only while its URL
+        # is being scraped, so at most len(pool) loads run concurrently.
+        page_pool = asyncio.Queue()
+        for _ in range(max(1, min(MAX_PARALLEL_PAGES, len(target_urls)))):
+            await page_pool.put(await context.new_page())
+
+        async def _worker(url, i):
+            return url, await _scrape_url_worker(page_pool, url, i, len(target_urls), config, scraping)
+
+        for future in asyncio.as_completed([
+            _worker(url, i) for i, url in enumerate(target_urls, 1)
+        ]):
+            yield await future
+    finally:
+        # Close only the context; the browser singleton stays warm for the
+        # next run and is shut down at interpreter exit.
+        await context.close()
 
 async def scrape_and_process_to_rag(config = None, config_file_path: str = None, api_key: str = None):
 
@@ -387,41 +696,91 @@ async def scrape_and_process_to_rag(config = None, config_file_path: str = None,
         if not api_key:
             raise ValueError("OpenAI API key not found")
     
-    documents = await scrape_to_documents(config, config_file_path)
-    
-    if not documents:
-        print("No documents scraped!")
-        return None
-    
     embeddings_model = embedding_service.create_embeddings_model(api_key)
-    
     text_splitter = text_chunker.create_text_splitter()
+
+    # Pipeline: the producer streams documents off the scraper while the
+    # consumer chunks and embeds them, so embedding overlaps with scraping
+    # instead of starting after the whole crawl. The bounded queue applies
+    # backpressure if scraping outruns embedding.
+    queue = asyncio.Queue(maxsize=128)
     chunk_documents = []
-    
-    for doc in documents:
-        doc_chunks = text_chunker.split_into_chunks(doc.page_content, text_splitter)
-        source_url = doc.metadata.get('source', 'unknown')
-        total_chunks = len(doc_chunks)
-        
-        for i, chunk_text in enumerate(doc_chunks):
-            chunk_doc = Document(
-                page_content=chunk_text,
-                metadata={
-                    'source': source_url,
-                    'chunk_index': i,
-                    'title': doc.metadata.get('title', ''),
-                    'timestamp': doc.metadata.get('timestamp', ''),
-                    'scraped_at': doc.metadata.get('scraped_at', '')
-                }
+    all_embeddings = []
+    loop = asyncio.get_running_loop()
+
+    async def _producer():
+        async for doc in scrape_documents_stream(config, config_file_path):
+            await queue.put(doc)
+        await queue.put(None)
+
+    async def _consumer(executor):
+        pending = []
+        pending_metadata = []
+
+        async def _flush():
+            nonlocal pending, pending_metadata
+            if not pending:
+                return
+            batch, pending = pending, []
+            metadata_items, pending_metadata = pending_metadata, []
+            vectors = await vector_database.aembed_documents_cached(
+                [d.page_content for d in batch], embeddings_model
             )
-            chunk_documents.append(chunk_doc)
-            
-            chunk_id = generate_chunk_id(source_url, i)
-            add_chunk(chunk_id, source_url, total_chunks)
-    
+            # Metadata rides along with the embed flush as one async bulk
+            # write instead of a blocking upsert per chunk.
+            await add_chunks_bulk(metadata_items)
+            chunk_documents.extend(batch)
+            all_embeddings.extend(vectors)
+
+        while True:
+            doc = await queue.get()
+            if doc is None:
+                break
+
+            # Chunking is pure-Python CPU work; run it in the process pool
+            # so it scales with core count and stays off the event loop.
+            doc_chunks = await loop.run_in_executor(
+                executor,
+                functools.partial(text_chunker.split_into_chunks, doc.page_content, text_splitter)
+            )
+            source_url = doc.metadata.get('source', 'unknown')
+            total_chunks = len(doc_chunks)
+
+            for i, chunk_text in enumerate(doc_chunks):
+                chunk_doc = Document(
+                    page_content=chunk_text,
+                    metadata={
+                        'source': source_url,
+                        'chunk_index': i,
+                        'title': doc.metadata.get('title', ''),
+                        'timestamp': doc.metadata.get('timestamp', ''),
+                        'scraped_at': doc.metadata.get('scraped_at', '')
+                    }
+                )
+                pending.append(chunk_doc)
+
+                chunk_id = generate_chunk_id(source_url, i)
+                pending_metadata.append(build_chunk_item(chunk_id, source_url, total_chunks))
+
+                if len(pending) >= EMBED_FLUSH_CHUNKS:
+                    await _flush()
+
+        await _flush()
+
+    with ProcessPoolExecutor() as executor:
+        await asyncio.gather(_producer(), _consumer(executor))
+
+    if not chunk_documents:
+        print("No documents scraped!")
+        return None
+
     print(f"Creating vector store with {len(chunk_documents)} document chunks...")
-    
-    vector_database.create_vector_store(chunk_documents, embeddings_model)
+
+    # The chunks were embedded as they streamed through; hand the vectors
+    # to the store so the corpus is never re-embedded during index build.
+    await vector_database.acreate_vector_store(
+        chunk_documents, embeddings_model, precomputed_embeddings=all_embeddings
+    )
     print("Vector store created successfully!")
     print(f"Created {len(chunk_documents)} chunk metadata records")
     